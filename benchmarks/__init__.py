@@ -0,0 +1,28 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmarks for the event scheduler.
+
+``generator`` builds synthetic events of any size, and ``run`` times
+the scheduler on them. From the top of the source tree::
+
+  python -m benchmarks.run
+  python -m benchmarks.run --sizes 100,1000 \\
+      --benchmarks schedule,rollback --json results.json
+
+Each benchmark runs in a fresh process, so peak memory figures aren't
+polluted by earlier runs. Results written with ``--json`` can be
+compared with ``--compare`` to see what a change did.
+"""
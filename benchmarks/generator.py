@@ -0,0 +1,172 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Synthetic event generator.
+
+Real events have a handful of topics everybody wants and a long tail
+of topics few people want, so topic popularity follows a Zipf
+distribution, and session capacities are sized to roughly match
+demand, with some random variation so that some sessions are tight.
+Each attendee's choices are redrawn until they have sessions in
+enough different time-slots to fill a schedule, so that the events
+can be scheduled at all. The same arguments always generate the same
+event.
+"""
+
+from bisect import bisect
+import random
+
+from event_scheduler import Scheduler
+
+
+def generate(attendees, time_slots=4, topics=None, preferences=None,
+             exponent=1.0, slack=1.3, manual=0.01, seed=0, **kwargs):
+    """Generate an event and return a ``Scheduler`` loaded with it.
+
+    Arguments
+    ---------
+
+    ``attendees``
+        Number of attendees.
+    ``time_slots``
+        Number of time-slots.
+    ``topics``
+        Number of topics. Defaults to one for every 25 attendees, but
+        at least twice the number of time-slots.
+    ``preferences``
+        Number of topics each attendee chooses. Defaults to half again
+        the number of time-slots.
+    ``exponent``
+        Zipf exponent of topic popularity; the topic of rank k is
+        chosen with weight 1 / k ** exponent.
+    ``slack``
+        Total capacity of each time-slot as a multiple of the number
+        of attendees.
+    ``manual``
+        Fraction of attendees who get one manual assignment.
+    ``seed``
+        Random number generator seed.
+
+    Any other keyword arguments are passed to ``Scheduler``.
+    """
+
+    rng = random.Random(seed)
+    if topics is None:
+        topics = max(attendees // 25, time_slots * 2)
+    if preferences is None:
+        preferences = min(time_slots + (time_slots + 1) // 2, topics)
+
+    scheduler = Scheduler(**kwargs)
+    slot_names = [u'Slot {}'.format(i + 1) for i in range(time_slots)]
+    scheduler.add_time_slots(slot_names)
+
+    weights = [1.0 / (k + 1) ** exponent for k in range(topics)]
+    total_weight = sum(weights)
+    cumulative = []
+    running = 0.0
+    for weight in weights:
+        running += weight
+        cumulative.append(running)
+
+    # Each topic is held in a random subset of at least half of the
+    # time-slots, with capacity in proportion to its popularity.
+    offered = [rng.sample(slot_names, rng.randint((time_slots + 1) // 2,
+                                                  time_slots))
+               for k in range(topics)]
+    capacities = [
+        [max(2, int(attendees * time_slots * weights[k] / total_weight /
+                    len(offered[k]) * slack * rng.uniform(0.75, 1.25)))
+         for slot in offered[k]]
+        for k in range(topics)]
+
+    # Top up each time-slot's least popular sessions until the slot as
+    # a whole has enough room.
+    for slot in slot_names:
+        sessions = [(k, offered[k].index(slot)) for k in range(topics)
+                    if slot in offered[k]]
+        if not sessions:
+            continue
+        room = sum(capacities[k][i] for k, i in sessions)
+        needed = int(attendees * slack) - room
+        i = 0
+        while needed > 0:
+            k, j = sessions[-1 - i % len(sessions)]
+            capacities[k][j] += 1
+            needed -= 1
+            i += 1
+
+    scheduler.add_topics(
+        (u'Topic {}'.format(k + 1), list(zip(offered[k], capacities[k])))
+        for k in range(topics))
+
+    # How many different time-slots each attendee needs sessions in, or
+    # as many as there can be, if the topics are too few for that.
+    needed = min(time_slots, preferences,
+                 _distinct_slots(range(topics), offered))
+
+    def choices():
+        while True:
+            chosen = []
+            while len(chosen) < preferences:
+                k = bisect(cumulative, rng.random() * total_weight)
+                k = min(k, topics - 1)
+                if k not in chosen:
+                    chosen.append(k)
+            if _distinct_slots(chosen, offered) >= needed:
+                return [u'Topic {}'.format(k + 1) for k in chosen]
+
+    scheduler.add_attendees(
+        (u'Attendee {}'.format(i + 1), u'Organization {}'.format(i % 97),
+         choices())
+        for i in range(attendees))
+
+    for attendee in rng.sample(scheduler._attendee_list,
+                               int(attendees * manual)):
+        topic = rng.choice(attendee.preferences).topic
+        # Only use a time-slot that leaves the attendee's other choices
+        # enough time-slots to fill the rest of their schedule.
+        others = [p.topic.id for p in attendee.preferences
+                  if p.topic is not topic]
+        sessions = [s for s in topic.sessions
+                    if _distinct_slots(others, offered, s.time_slot.name) >=
+                    needed - 1]
+        if sessions:
+            # This quietly does nothing if the session is full.
+            scheduler.manually_assign(attendee, topic, rng.choice(sessions))
+
+    return scheduler
+
+
+def _distinct_slots(chosen, offered, excluded=None):
+    """Return how many topics can be held in different time-slots.
+
+    This is a simple augmenting path bipartite matching of the topics
+    in ``chosen`` to the time-slots in which they're ``offered``, other
+    than the ``excluded`` one.
+    """
+
+    matched = {}
+
+    def place(k, visited):
+        for slot in offered[k]:
+            if slot in visited or slot == excluded:
+                continue
+            visited.add(slot)
+            if slot not in matched or place(matched[slot], visited):
+                matched[slot] = k
+                return True
+        return False
+
+    return sum(1 for k in chosen if place(k, set()))
@@ -0,0 +1,300 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Time the scheduler on generated events.
+
+Each result records:
+
+``seconds``
+    Wall-clock time of the operation being measured, not including
+    generating the event or any other setup.
+``peak_mb``
+    Peak memory. With ``tracemalloc`` (Python 3), this is the peak
+    allocated during the operation, measured in a second run on a
+    freshly generated copy of the event, since tracing slows
+    everything down too much to time the same run; otherwise it's the
+    peak resident size of the process that ran the benchmark, setup
+    included.
+``score``
+    Total score of all attendees afterward (lower is better).
+``unfilled``
+    Number of attendees whose schedules aren't full afterward.
+``ok``
+    Whether the operation succeeded, e.g., False if ``schedule``
+    raised ``ScheduleFailureError``.
+
+Some benchmarks add more; see their docstrings.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from event_scheduler import ScheduleFailureError
+
+from .generator import generate
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+# Whether ``_timed`` measures memory with ``tracemalloc`` rather than
+# time; see ``run_one``.
+_tracing = False
+
+
+def bench_schedule(scheduler, rng):
+    """``schedule()`` from scratch."""
+
+    return _timed(scheduler.schedule)
+
+
+def bench_random_schedule(scheduler, rng):
+    """``random_schedule()`` from scratch."""
+
+    random.seed(rng.random())
+    return _timed(scheduler.random_schedule)
+
+
+def bench_optimal_schedule(scheduler, rng):
+    """``optimal_schedule()`` from scratch, as a yardstick for quality.
+
+    Adds ``optimal``, whether the result is provably optimal.
+    """
+
+    optimal = []
+    result = _timed(lambda: optimal.append(scheduler.optimal_schedule()))
+    result['optimal'] = bool(optimal and optimal[0])
+    return result
+
+
+def bench_swap(scheduler, rng):
+    """``swap()`` on up to 200 attendees with the worst scores.
+
+    The event is scheduled first. Adds ``calls`` and ``swapped``, the
+    number of ``swap`` calls made and how many of them succeeded, and
+    ``seconds`` is for all of the calls together.
+    """
+
+    _schedule_or_fill(scheduler)
+    unlucky = sorted(scheduler._attendee_list,
+                     key=lambda a: (-a.score, a.id))[:200]
+    swapped = []
+    result = _timed(lambda: swapped.extend(
+        a for a in unlucky if scheduler.swap(a)))
+    result.update(calls=len(unlucky), swapped=len(swapped))
+    return result
+
+
+def bench_rollback(scheduler, rng):
+    """Checkpoint, clear the whole schedule, and roll back.
+
+    The event is scheduled first. Adds ``changes``, the number of
+    assignments undone, and ``clear_seconds``, the part of
+    ``seconds`` spent clearing rather than rolling back. ``ok`` is
+    whether the schedule was restored exactly.
+    """
+
+    _schedule_or_fill(scheduler)
+    before = _assignments(scheduler)
+    result = {}
+
+    def clear_and_rollback():
+        start = time.time()
+        scheduler.checkpoint('benchmark')
+        scheduler.clear_schedule()
+        result['clear_seconds'] = time.time() - start
+        result['changes'] = len(scheduler._undo_log) // 4
+        scheduler.rollback('benchmark')
+
+    result.update(_timed(clear_and_rollback))
+    result['ok'] = _assignments(scheduler) == before
+    return result
+
+
+BENCHMARKS = {
+    'schedule': bench_schedule,
+    'random_schedule': bench_random_schedule,
+    'optimal_schedule': bench_optimal_schedule,
+    'swap': bench_swap,
+    'rollback': bench_rollback,
+}
+
+
+def _schedule_or_fill(scheduler):
+    try:
+        scheduler.schedule()
+    except ScheduleFailureError:
+        pass
+
+
+def _assignments(scheduler):
+    return sorted((a.id, p.session.id) for a in scheduler._attendee_list
+                  for p in a.preferences if p.session is not None)
+
+
+def _timed(operation):
+    gc.collect()
+    if _tracing:
+        tracemalloc.start()
+    start = time.time()
+    ok = True
+    try:
+        operation()
+    except ScheduleFailureError:
+        ok = False
+    seconds = time.time() - start
+    if _tracing:
+        peak = tracemalloc.get_traced_memory()[1] / 1048576.0
+        tracemalloc.stop()
+    elif tracemalloc is not None:
+        peak = None
+    elif resource is not None:
+        # Kilobytes on Linux, bytes on Mac OS X.
+        scale = 1048576.0 if sys.platform == 'darwin' else 1024.0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    else:
+        peak = None
+    return {'seconds': seconds, 'peak_mb': peak, 'ok': ok}
+
+
+def run_one(args):
+    """Run one benchmark on one event size; meant for a child process.
+
+    With ``tracemalloc``, the benchmark is run once untraced for the
+    time and once more, on a fresh copy of the event, for the memory.
+
+    Raises ``ValueError`` if the generated event can't possibly be
+    scheduled (see ``Scheduler.check_feasibility``), since the results
+    would only measure how fast the scheduler fails.
+    """
+
+    global _tracing
+    name, size, seed, options = args
+    scheduler = generate(size, seed=seed, **options)
+    report = scheduler.check_feasibility()
+    if not report:
+        raise ValueError(u'Event with {} attendees and seed {} is '
+                         u'infeasible: {}'.format(size, seed, report))
+    if tracemalloc is not None:
+        _tracing = True
+        try:
+            peak = BENCHMARKS[name](generate(size, seed=seed, **options),
+                                    random.Random(seed))['peak_mb']
+        finally:
+            _tracing = False
+    result = BENCHMARKS[name](scheduler, random.Random(seed))
+    if tracemalloc is not None:
+        result['peak_mb'] = peak
+    n = len(scheduler.time_slots)
+    result.setdefault('ok', True)
+    result.update(
+        benchmark=name, attendees=size, seed=seed,
+        score=sum(a.score for a in scheduler._attendee_list),
+        unfilled=sum(1 for a in scheduler._attendee_list
+                     if a.num_assignments < min(len(a.preferences), n)))
+    return result
+
+
+def run(names=None, sizes=DEFAULT_SIZES, seed=0, **options):
+    """Run benchmarks and return a list of result dictionaries.
+
+    Each benchmark is run in a separate process. ``options`` are
+    passed to ``generator.generate``.
+    """
+
+    results = []
+    for size in sizes:
+        for name in names or sorted(BENCHMARKS):
+            pool = multiprocessing.Pool(1)
+            try:
+                results.append(pool.apply(run_one,
+                                          ((name, size, seed, options),)))
+            finally:
+                pool.terminate()
+    return results
+
+
+def _format(result, baseline=None):
+    line = u'{benchmark:16} {attendees:>7} {seconds:>10.3f}s {peak:>9} ' \
+        u'{score:>9} {unfilled:>8} {ok}'.format(
+            peak='{:.1f}MB'.format(result['peak_mb'])
+            if result['peak_mb'] is not None else '-', **result)
+    if baseline:
+        line += u'  ({:+.0%} time, {:+d} score)'.format(
+            result['seconds'] / max(baseline['seconds'], 1e-9) - 1,
+            result['score'] - baseline['score'])
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time the event scheduler on generated events.')
+    parser.add_argument('--benchmarks', default=','.join(sorted(BENCHMARKS)),
+                        help='Comma-separated benchmarks to run '
+                        '(default: %(default)s)')
+    parser.add_argument('--sizes',
+                        default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma-separated numbers of attendees '
+                        '(default: %(default)s)')
+    parser.add_argument('--time-slots', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--arrays', action='store_true',
+                        help='Use Scheduler(arrays=True)')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', help='Compare with results written '
+                        'earlier with --json')
+    args = parser.parse_args(argv)
+
+    names = args.benchmarks.split(',')
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error('Unknown benchmark {}'.format(name))
+    baselines = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baselines = {(r['benchmark'], r['attendees']): r
+                         for r in json.load(f)}
+
+    print(u'{:16} {:>7} {:>11} {:>9} {:>9} {:>8} {}'.format(
+        'benchmark', 'size', 'time', 'peak', 'score', 'unfilled', 'ok'))
+    results = []
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for name in names:
+            result = run([name], [size], args.seed,
+                         time_slots=args.time_slots, arrays=args.arrays)[0]
+            results.append(result)
+            print(_format(result, baselines.get((name, size))))
+            sys.stdout.flush()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,6 @@ from .scheduler import (  # noqa
     Scheduler,
     ScheduleFailureError,
     NoMoreSpaceError,
+    LoadError,
 )
+from .stats import ScheduleStats  # noqa
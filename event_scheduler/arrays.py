@@ -0,0 +1,143 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""NumPy array representation of a scheduler's state.
+
+This is used by ``Scheduler(arrays=True)`` to do the per-pass
+ranking, sorting and scoring of attendees with vectorized operations
+rather than by walking the attendee objects. It requires NumPy, which
+is otherwise not needed by this package.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class ArrayState(object):
+    """Compact array mirror of a ``Scheduler``.
+
+    Attendees are rows, in order by id. The ``Scheduler`` keeps the
+    arrays in sync with its objects by calling ``link`` and ``unlink``
+    whenever an assignment is made or removed, so the objects remain
+    the interface and the arrays are just a faster way to look at them
+    all at once.
+
+    Public properties
+    -----------------
+
+    ``preferences``
+        Attendees x preferences matrix of topic numbers, in
+        preference order, padded with -1.
+    ``assigned``
+        Attendees x preferences boolean matrix of which preferences
+        are assigned.
+    ``schedule``
+        Attendees x time-slots matrix of the ids of assigned sessions,
+        or -1.
+    ``capacity``
+        Capacity of each session, by session id.
+    ``occupancy``
+        Number of attendees in each session, by session id.
+    ``name_rank``
+        Position of each attendee in order by ``"{org} - {name}"``,
+        for breaking ties when sorting.
+    """
+
+    def __init__(self, scheduler):
+        if numpy is None:
+            raise ImportError('NumPy is required for Scheduler(arrays=True)')
+
+        attendees = scheduler._attendee_list
+        sessions = scheduler._session_list
+
+        width = max([len(a.preferences) for a in attendees] or [0])
+        self.preferences = numpy.full((len(attendees), width), -1,
+                                      dtype=numpy.int32)
+        self.assigned = numpy.zeros((len(attendees), width), dtype=bool)
+        self.schedule = numpy.full(
+            (len(attendees), len(scheduler._time_slot_list)), -1,
+            dtype=numpy.int32)
+        self.capacity = numpy.array([s.capacity for s in sessions],
+                                    dtype=numpy.int32)
+        self.occupancy = numpy.array([len(s.attendees) for s in sessions],
+                                     dtype=numpy.int32)
+        self.num_preferences = numpy.array(
+            [len(a.preferences) for a in attendees], dtype=numpy.int32)
+        self._indexes = numpy.arange(width, dtype=numpy.int32)
+
+        for attendee in attendees:
+            for preference in attendee.preferences:
+                self.preferences[attendee.id, preference.index] = \
+                    preference.topic.id
+                if preference.assigned:
+                    session = preference.session
+                    self.assigned[attendee.id, preference.index] = True
+                    self.schedule[attendee.id, session.time_slot.id] = \
+                        session.id
+
+        self.name_rank = numpy.empty(len(attendees), dtype=numpy.int32)
+        self.name_rank[sorted(range(len(attendees)),
+                              key=lambda i: str(attendees[i]))] = \
+            numpy.arange(len(attendees))
+
+    def link(self, attendee, preference, session):
+        """Record an assignment made by the scheduler."""
+
+        self.assigned[attendee.id, preference.index] = True
+        self.schedule[attendee.id, session.time_slot.id] = session.id
+        # Assigning a Python int is much faster than += on an element.
+        self.occupancy[session.id] = len(session.attendees)
+
+    def unlink(self, attendee, preference, session):
+        """Record an assignment removed by the scheduler."""
+
+        self.assigned[attendee.id, preference.index] = False
+        self.schedule[attendee.id, session.time_slot.id] = -1
+        self.occupancy[session.id] = len(session.attendees)
+
+    def max_assigned_preferences(self):
+        """Return each attendee's worst assigned preference, or -1."""
+
+        width = self.assigned.shape[1]
+        last = width - 1 - numpy.argmax(self.assigned[:, ::-1], axis=1)
+        return numpy.where(self.assigned.any(axis=1), last, -1)
+
+    def unassigned_rankings(self, remaining):
+        """Return the sum of each attendee's top unassigned preferences.
+
+        Only the first ``remaining`` unassigned preferences of each
+        attendee are counted.
+        """
+
+        unassigned = (self.preferences >= 0) & ~self.assigned
+        counted = unassigned & (unassigned.cumsum(axis=1) <= remaining)
+        return (counted * self._indexes).sum(axis=1)
+
+    def time_slot_order(self, remaining, run_order_rankings):
+        """Return attendee ids in order for a pass of the time-slot phase.
+
+        See ``Scheduler.schedule``.
+        """
+
+        return numpy.lexsort((self.name_rank, run_order_rankings,
+                              self.unassigned_rankings(remaining)))
+
+    def improve_order(self):
+        """Return attendee ids in order for a round of the improve phase."""
+
+        return numpy.lexsort((self.name_rank,
+                              -self.max_assigned_preferences()))
@@ -0,0 +1,73 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Splitting an event into independent parts.
+
+Two topics are linked if somebody wants both of them, and a component
+is a group of topics that are linked to each other, directly or
+through other topics, along with the attendees who want them. Nothing
+that's done to the attendees of one component can make room for, or
+take room from, the attendees of another, so each component can be
+scheduled on its own.
+
+Time-slots don't link topics. A session only competes with another
+session in the same time-slot for the attendees who want both topics,
+and those attendees already link them.
+"""
+
+
+def find(topics, attendees):
+    """Return the connected components of an event.
+
+    The result is a list of (topics, attendees) tuples, ordered by the
+    first topic of each component, and the topics and attendees in
+    each are in the same order as in the arguments. Topics that nobody
+    wants and attendees who want nothing are left out.
+    """
+
+    parent = {t: t for t in topics}
+
+    def root(topic):
+        while parent[topic] is not topic:
+            parent[topic] = parent[parent[topic]]
+            topic = parent[topic]
+        return topic
+
+    for attendee in attendees:
+        if not attendee.preferences:
+            continue
+        first = root(attendee.preferences[0].topic)
+        for preference in attendee.preferences[1:]:
+            other = root(preference.topic)
+            if other is not first:
+                parent[other] = first
+
+    components = {}
+    order = []
+    for attendee in attendees:
+        if not attendee.preferences:
+            continue
+        topic = root(attendee.preferences[0].topic)
+        if topic not in components:
+            components[topic] = ([], [])
+        components[topic][1].append(attendee)
+    for topic in topics:
+        component = components.get(root(topic))
+        if component is None:
+            continue
+        if not component[0]:
+            order.append(component)
+        component[0].append(topic)
+    return order
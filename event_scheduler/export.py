@@ -0,0 +1,214 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Streaming export of schedules.
+
+Use these through ``Scheduler.export``. There are three reports:
+
+``schedules``
+    One record per attendee per time-slot, with the topic they're
+    attending then, if any.
+``rosters``
+    One record per attendee per session they're attending, in session
+    order.
+``summary``
+    One record per session, with how full it is.
+
+A topic can have more than one session in a time-slot, so records for
+sessions include a ``room`` field, which is the number of the session
+within the time-slot (see ``Session.room``), or empty if there's only
+one.
+
+Each report can be written as text, CSV (with a header row) or JSON (an
+array of objects). Everything is generated one record at a time and
+written as it's generated, so no report is ever held in memory as a
+whole.
+"""
+
+import csv
+import io
+import json
+import sys
+
+_PY2 = sys.version_info[0] < 3
+
+REPORTS = ('schedules', 'rosters', 'summary')
+FORMATS = ('text', 'csv', 'json')
+
+_FIELDS = {
+    'schedules': ('organization', 'name', 'time_slot', 'topic', 'room',
+                  'preference', 'immutable'),
+    'rosters': ('time_slot', 'topic', 'room', 'organization', 'name',
+                'preference', 'immutable'),
+    'summary': ('time_slot', 'topic', 'room', 'capacity', 'attendees',
+                'free'),
+}
+
+
+def schedule_records(scheduler):
+    """Generate a record for each attendee and time-slot."""
+
+    time_slots = scheduler._time_slot_list
+    for attendee in scheduler._attendee_list:
+        for time_slot in time_slots:
+            session = attendee.booked_sessions.get(time_slot)
+            if session is None:
+                yield {'organization': attendee.organization,
+                       'name': attendee.name, 'time_slot': time_slot.name,
+                       'topic': None, 'room': None, 'preference': None,
+                       'immutable': False}
+            else:
+                preference = attendee.topic_preferences[session.topic]
+                yield {'organization': attendee.organization,
+                       'name': attendee.name, 'time_slot': time_slot.name,
+                       'topic': session.topic.name, 'room': session.room,
+                       'preference': preference.index + 1,
+                       'immutable': preference.immutable}
+
+
+def roster_records(scheduler):
+    """Generate a record for each attendee in each session."""
+
+    for session in scheduler._session_list:
+        for attendee in sorted(session.attendees, key=lambda a: a.id):
+            preference = attendee.topic_preferences[session.topic]
+            yield {'time_slot': session.time_slot.name,
+                   'topic': session.topic.name, 'room': session.room,
+                   'organization': attendee.organization,
+                   'name': attendee.name,
+                   'preference': preference.index + 1,
+                   'immutable': preference.immutable}
+
+
+def summary_records(scheduler):
+    """Generate a record for each session."""
+
+    for session in scheduler._session_list:
+        yield {'time_slot': session.time_slot.name,
+               'topic': session.topic.name, 'room': session.room,
+               'capacity': session.capacity,
+               'attendees': len(session.attendees),
+               'free': session.capacity - len(session.attendees)}
+
+
+_RECORDS = {
+    'schedules': schedule_records,
+    'rosters': roster_records,
+    'summary': summary_records,
+}
+
+
+def write(scheduler, f, report='schedules', format='text'):
+    """Write a report to the open file ``f``.
+
+    Under Python 2, CSV must be written to a file opened in binary
+    mode, and text and JSON are encoded as UTF-8 unless ``f`` is an
+    ``io`` text file.
+    """
+
+    if report not in REPORTS:
+        raise ValueError('Unknown report {}'.format(report))
+    if format not in FORMATS:
+        raise ValueError('Unknown format {}'.format(format))
+    records = _RECORDS[report](scheduler)
+    if format == 'csv':
+        _write_csv(f, _FIELDS[report], records)
+        return
+    write_text = _text_writer(f)
+    if format == 'json':
+        lines = _json_lines(records)
+    else:
+        lines = _TEXT[report](records)
+    for line in lines:
+        write_text(line)
+
+
+def _text_writer(f):
+    if _PY2 and not isinstance(f, io.TextIOBase):
+        return lambda s: f.write(s.encode('utf-8'))
+    return f.write
+
+
+def _write_csv(f, fields, records):
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    for record in records:
+        row = [u'' if record[field] is None else type(u'')(record[field])
+               for field in fields]
+        if _PY2:
+            row = [cell.encode('utf-8') for cell in row]
+        writer.writerow(row)
+
+
+def _json_lines(records):
+    separator = u'[\n'
+    for record in records:
+        yield separator
+        yield type(u'')(json.dumps(record, sort_keys=True))
+        separator = u',\n'
+    yield u'[]\n' if separator == u'[\n' else u'\n]\n'
+
+
+def _schedule_text(records):
+    current = None
+    for record in records:
+        attendee = (record['organization'], record['name'])
+        if attendee != current:
+            if current is not None:
+                yield u'\n'
+            yield u'{} - {}\n'.format(*attendee)
+            current = attendee
+        yield u'  {}: {}{}{}\n'.format(
+            record['time_slot'],
+            u'-' if record['topic'] is None else record['topic'],
+            _room(record), u' (immutable)' if record['immutable'] else u'')
+
+
+def _roster_text(records):
+    current = None
+    for record in records:
+        session = (record['time_slot'], record['topic'], record['room'])
+        if session != current:
+            if current is not None:
+                yield u'\n'
+            yield u'{} - {}{}\n'.format(record['time_slot'], record['topic'],
+                                        _room(record))
+            current = session
+        yield u'  {} - {}{}\n'.format(
+            record['organization'], record['name'],
+            u' (immutable)' if record['immutable'] else u'')
+
+
+def _summary_text(records):
+    yield u'{:<20} {:<40} {:>4} {:>8} {:>9} {:>6}\n'.format(
+        u'Time slot', u'Topic', u'Room', u'Capacity', u'Attendees', u'Free')
+    for record in records:
+        yield u'{:<20} {:<40} {:>4} {:>8} {:>9} {:>6}\n'.format(
+            record['time_slot'], record['topic'],
+            u'' if record['room'] is None else record['room'],
+            record['capacity'], record['attendees'], record['free'])
+
+
+def _room(record):
+    if record['room'] is None:
+        return u''
+    return u' (room {})'.format(record['room'])
+
+
+_TEXT = {
+    'schedules': _schedule_text,
+    'rosters': _roster_text,
+    'summary': _summary_text,
+}
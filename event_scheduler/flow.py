@@ -0,0 +1,223 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Network flow algorithms used by the scheduler.
+
+This is a small, pure-Python implementation of the classic algorithms
+the ``Scheduler`` needs to reason about attendees, topics and session
+capacities as a flow network. You shouldn't need to use it directly.
+"""
+
+from collections import deque
+import heapq
+
+INFINITY = float('inf')
+
+
+class FlowNetwork(object):
+    """Directed network with integer edge capacities and costs.
+
+    Nodes are numbered from 0. Edges are stored in parallel lists
+    ("forward star" representation) rather than as objects, since
+    scheduling networks have hundreds of thousands of them. Every edge
+    is stored together with its residual reverse edge, so edge ``e``
+    and edge ``e ^ 1`` are always each other's reverse.
+
+    Public properties
+    -----------------
+
+    ``num_nodes``
+        Number of nodes in the network.
+    """
+
+    def __init__(self, num_nodes=0):
+        self.num_nodes = num_nodes
+        self.head = [-1] * num_nodes
+        self.next_edge = []
+        self.to = []
+        self.cap = []
+        self.cost = []
+
+    def add_node(self):
+        """Add a node and return its number."""
+
+        self.head.append(-1)
+        self.num_nodes += 1
+        return self.num_nodes - 1
+
+    def add_edge(self, u, v, capacity, cost=0):
+        """Add an edge from ``u`` to ``v`` and return its number."""
+
+        edge = len(self.to)
+        self.to.extend((v, u))
+        self.cap.extend((capacity, 0))
+        self.cost.extend((cost, -cost))
+        self.next_edge.extend((self.head[u], self.head[v]))
+        self.head[u] = edge
+        self.head[v] = edge + 1
+        return edge
+
+    def flow(self, edge):
+        """Return the amount of flow currently on an edge."""
+
+        return self.cap[edge ^ 1]
+
+    def max_flow(self, source, sink):
+        """Push as much flow as possible from ``source`` to ``sink``.
+
+        Costs are ignored. Returns the amount of flow added.
+        """
+
+        return self._blocking_flow(source, sink, None)
+
+    def min_cost_flow(self, source, sink):
+        """Push a maximum flow of minimum cost from ``source`` to ``sink``.
+
+        All edge costs must be non-negative. This uses the primal-dual
+        method: each phase computes shortest path distances with
+        Dijkstra's algorithm, then saturates every shortest path at
+        once with a blocking flow, so the number of phases is bounded
+        by the number of distinct path costs rather than by the amount
+        of flow.
+
+        Returns a tuple of (flow, cost).
+        """
+
+        potential = [0] * self.num_nodes
+        total_flow = 0
+        total_cost = 0
+        while True:
+            dist = self._shortest_paths(source, potential)
+            if dist[sink] == INFINITY:
+                break
+            for v in range(self.num_nodes):
+                if dist[v] != INFINITY:
+                    potential[v] += dist[v]
+            flow = self._blocking_flow(source, sink, potential)
+            total_flow += flow
+            total_cost += flow * (potential[sink] - potential[source])
+        return total_flow, total_cost
+
+    def reachable(self, source):
+        """Return the set of nodes reachable from ``source``.
+
+        Only edges with residual capacity are followed, so after a
+        maximum flow this is the source side of a minimum cut.
+        """
+
+        head, next_edge, to, cap = self.head, self.next_edge, self.to, \
+            self.cap
+        seen = set([source])
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            e = head[u]
+            while e != -1:
+                v = to[e]
+                if cap[e] > 0 and v not in seen:
+                    seen.add(v)
+                    queue.append(v)
+                e = next_edge[e]
+        return seen
+
+    def _shortest_paths(self, source, potential):
+        """Dijkstra's algorithm over residual edges, using reduced costs."""
+
+        head, next_edge, to, cap, cost = self.head, self.next_edge, \
+            self.to, self.cap, self.cost
+        dist = [INFINITY] * self.num_nodes
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            pu = potential[u]
+            e = head[u]
+            while e != -1:
+                if cap[e] > 0:
+                    v = to[e]
+                    nd = d + cost[e] + pu - potential[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+                e = next_edge[e]
+        return dist
+
+    def _blocking_flow(self, source, sink, potential):
+        """Dinic's algorithm, optionally restricted to admissible edges.
+
+        If ``potential`` is specified, only edges whose reduced cost is
+        zero, i.e., edges on shortest paths, are used.
+        """
+
+        head, next_edge, to, cap, cost = self.head, self.next_edge, \
+            self.to, self.cap, self.cost
+        total = 0
+        while True:
+            # Breadth-first search to build the level graph.
+            level = [-1] * self.num_nodes
+            level[source] = 0
+            queue = deque([source])
+            while queue and level[sink] == -1:
+                u = queue.popleft()
+                e = head[u]
+                while e != -1:
+                    v = to[e]
+                    if cap[e] > 0 and level[v] == -1 and \
+                       (potential is None or
+                            cost[e] + potential[u] == potential[v]):
+                        level[v] = level[u] + 1
+                        queue.append(v)
+                    e = next_edge[e]
+            if level[sink] == -1:
+                return total
+
+            # Depth-first search for augmenting paths in the level
+            # graph, remembering how far we got through each node's
+            # edges so that dead ends are never revisited.
+            current = list(head)
+            path = []
+            u = source
+            while True:
+                if u == sink:
+                    flow = min(cap[e] for e in path)
+                    for e in path:
+                        cap[e] -= flow
+                        cap[e ^ 1] += flow
+                    total += flow
+                    path = []
+                    u = source
+                    continue
+                e = current[u]
+                while e != -1:
+                    v = to[e]
+                    if cap[e] > 0 and level[v] == level[u] + 1 and \
+                       (potential is None or
+                            cost[e] + potential[u] == potential[v]):
+                        break
+                    e = next_edge[e]
+                current[u] = e
+                if e != -1:
+                    path.append(e)
+                    u = to[e]
+                    continue
+                # Dead end; back up.
+                level[u] = -1
+                if not path:
+                    break
+                e = path.pop()
+                u = to[e ^ 1]
+                current[u] = next_edge[e]
@@ -0,0 +1,69 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Time-slots with start and end times.
+
+A time-slot can optionally have a start and end time, as numbers in
+whatever unit you like, e.g., minutes since midnight. A time-slot runs
+from its start time up to, but not including, its end time, so a slot
+from 60 to 90 doesn't overlap one from 90 to 120. Time-slots with
+times can overlap each other, e.g., when an event mixes 30-, 60- and
+90-minute blocks. A time-slot without times overlaps only itself.
+
+An attendee can't be booked in two overlapping time-slots. Each
+time-slot has a bit mask of the time-slots it overlaps (see
+``TimeSlot.conflicts``), and each attendee has a bit mask of the
+time-slots they're booked in, so checking for a clash is a single
+bitwise AND no matter how many time-slots there are.
+"""
+
+
+def overlap(a, b):
+    """Return whether two time-slots overlap."""
+
+    if a is b:
+        return True
+    if a.start is None or b.start is None:
+        return False
+    return a.start < b.end and b.start < a.end
+
+
+def max_disjoint(time_slots):
+    """Return the most time-slots that can be attended without overlaps.
+
+    This is the most sessions an attendee can be booked in.
+    """
+
+    count = 0
+    last_end = None
+    for time_slot in sorted((t for t in time_slots if t.start is not None),
+                            key=lambda t: t.end):
+        if last_end is None or time_slot.start >= last_end:
+            count += 1
+            last_end = time_slot.end
+    return count + sum(1 for t in time_slots if t.start is None)
+
+
+def any_overlap(time_slots):
+    """Return whether any two of the time-slots overlap."""
+
+    last_end = None
+    for time_slot in sorted((t for t in time_slots if t.start is not None),
+                            key=lambda t: t.start):
+        if last_end is not None and time_slot.start < last_end:
+            return True
+        last_end = max(last_end, time_slot.end) if last_end is not None \
+            else time_slot.end
+    return False
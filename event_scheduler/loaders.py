@@ -0,0 +1,185 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Readers for loading scheduling data from CSV and JSON files.
+
+Each reader is a generator of (label, record) tuples, where the label
+says where the record came from (for error messages) and the record is
+in the form expected by ``Scheduler.add_time_slots``,
+``Scheduler.add_topics`` or ``Scheduler.add_attendees``. Files are
+read one line at a time, so they can be as large as you like. A line
+that can't be parsed is yielded as an exception instead of a record,
+so that the ``Scheduler`` can report it along with any other problems.
+
+Use these through ``Scheduler.load_csv`` and ``Scheduler.load_json``.
+
+CSV formats, one record per row:
+
+  time slots: name[, start, end]
+  topics:     name, time-slot, capacity[, time-slot, capacity ...]
+  attendees:  name, organization, topic[, topic ...]
+
+JSON Lines formats, one object per line:
+
+  time slots: "name" or {"name": ...[, "start": ..., "end": ...]}
+  topics:     {"name": ..., "time_slots": [[time-slot, capacity], ...]}
+  attendees:  {"name": ..., "organization": ..., "topics": [...]
+              [, "available": [time-slot, ...]]}
+
+Time-slot start and end times are numbers; see the ``intervals``
+module. Attendees who are only available for some time-slots can only
+be loaded from JSON.
+"""
+
+from contextlib import contextmanager
+import csv
+import io
+import json
+import sys
+
+_PY2 = sys.version_info[0] < 3
+
+
+@contextmanager
+def _opened(source, binary):
+    """Open ``source`` if it's a file name, or use it as-is if it's a file."""
+
+    if hasattr(source, 'read'):
+        yield source
+    elif binary:
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        with io.open(source, 'r', encoding='utf-8', newline='') as f:
+            yield f
+
+
+def _name(source):
+    if hasattr(source, 'read'):
+        return getattr(source, 'name', u'<stream>')
+    return source
+
+
+def csv_records(source, kind, header=False):
+    """Generate (label, record) tuples from a CSV file.
+
+    ``kind`` is one of "time_slots", "topics" or "attendees". If
+    ``header`` is true, the first row is skipped. Blank rows and empty
+    trailing cells are ignored.
+    """
+
+    parse = _CSV_PARSERS[kind]
+    name = _name(source)
+    # The Python 2 csv module only reads byte strings.
+    with _opened(source, _PY2) as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if header:
+                header = False
+                continue
+            if _PY2:
+                row = [cell.decode('utf-8') for cell in row]
+            while row and not row[-1].strip():
+                row.pop()
+            if not row:
+                continue
+            label = u'{}, line {}'.format(name, reader.line_num)
+            try:
+                yield label, parse(row)
+            except (ValueError, IndexError) as e:
+                yield label, e
+
+
+def _csv_time_slot(row):
+    if len(row) == 1:
+        return row[0]
+    if len(row) != 3:
+        raise ValueError('Expected name, or name, start time and end time')
+    return row[0], _number(row[1]), _number(row[2])
+
+
+def _number(cell):
+    try:
+        return int(cell)
+    except ValueError:
+        return float(cell)
+
+
+def _csv_topic(row):
+    if len(row) % 2 != 1:
+        raise ValueError('Expected name followed by time-slot, capacity '
+                         'pairs')
+    return row[0], [(row[i], int(row[i + 1])) for i in range(1, len(row), 2)]
+
+
+def _csv_attendee(row):
+    if len(row) < 2:
+        raise ValueError('Expected name, organization and topics')
+    return row[0], row[1], row[2:]
+
+
+_CSV_PARSERS = {
+    'time_slots': _csv_time_slot,
+    'topics': _csv_topic,
+    'attendees': _csv_attendee,
+}
+
+
+def json_records(source, kind):
+    """Generate (label, record) tuples from a JSON Lines file.
+
+    ``kind`` is one of "time_slots", "topics" or "attendees". Blank
+    lines are ignored.
+    """
+
+    parse = _JSON_PARSERS[kind]
+    name = _name(source)
+    with _opened(source, False) as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            label = u'{}, line {}'.format(name, line_num)
+            try:
+                yield label, parse(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                if isinstance(e, KeyError):
+                    e = ValueError('Missing field {}'.format(e))
+                yield label, e
+
+
+def _json_time_slot(obj):
+    if isinstance(obj, type(u'')):
+        return obj
+    if 'start' in obj or 'end' in obj:
+        return obj['name'], obj['start'], obj['end']
+    return obj['name']
+
+
+def _json_topic(obj):
+    return obj['name'], [(t[0], int(t[1])) for t in obj['time_slots']]
+
+
+def _json_attendee(obj):
+    if 'available' in obj:
+        return obj['name'], obj['organization'], obj['topics'], \
+            obj['available']
+    return obj['name'], obj['organization'], obj['topics']
+
+
+_JSON_PARSERS = {
+    'time_slots': _json_time_slot,
+    'topics': _json_topic,
+    'attendees': _json_attendee,
+}
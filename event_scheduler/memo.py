@@ -0,0 +1,101 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Remembering swap attempts that failed.
+
+``Scheduler.swap`` tries to fix an unlucky attendee by taking another
+attendee's seat and finding the other attendee somewhere else to go.
+Whether that works depends only on the two attendees' assignments and
+on which sessions of the topics they want have room. The scheduler
+keeps a clock that ticks whenever an assignment is made or removed.
+It stamps the attendee with the time, and also the topic, if the
+change filled one of its sessions or made room in one. If neither
+attendee nor any topic they want was stamped after an attempt failed,
+trying it again would fail the same way.
+
+Changes made while a checkpoint is open aren't stamped until the
+checkpoint is committed, and ones that are rolled back never are,
+since rolling back restores what the stamps describe.
+
+In practice, that's rare: nearly every failed attempt has had
+something change by the time it comes up again. Scheduling generated
+events of 2,000 to 10,000 attendees with 1% to 30% spare capacity,
+the memo skipped between none and 9% of attempts, and the runs were
+a few percent slower with it than without it. So ``Scheduler``
+doesn't use it unless it's given a ``swap_memo_size``.
+"""
+
+from collections import OrderedDict
+
+
+class FailedSwaps(object):
+    """Memo of failed swap attempts.
+
+    Each attempt is keyed by (unlucky attendee id, other attendee id,
+    session id), and remembered along with the clock time at which it
+    failed. When the memo is full, the attempts that failed longest
+    ago are forgotten first.
+
+    Public properties
+    -----------------
+
+    ``size``
+        Most attempts to remember. 0 disables the memo.
+    ``hits``
+        Number of attempts that were skipped because they were known
+        to fail.
+    ``misses``
+        Number of attempts that had to be made.
+    """
+
+    def __init__(self, size=100000):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._failures = OrderedDict()
+
+    def __len__(self):
+        return len(self._failures)
+
+    def failed(self, key, stamp):
+        """Return whether an attempt is known to fail.
+
+        ``stamp`` is the latest time at which anything the attempt
+        depends on changed.
+        """
+
+        failed_at = self._failures.get(key)
+        if failed_at is not None and failed_at >= stamp:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, key, time):
+        """Remember that an attempt failed at a clock time."""
+
+        failures = self._failures
+        if not self.size:
+            return
+        if key in failures:
+            del failures[key]
+        elif len(failures) >= self.size:
+            failures.popitem(last=False)
+        failures[key] = time
+
+    def clear(self):
+        """Forget all failed attempts."""
+
+        self._failures.clear()
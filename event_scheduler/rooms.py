@@ -0,0 +1,118 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Choosing among the sessions of a topic.
+
+A topic can have several sessions ("rooms") in the same time-slot.
+The sessions of a topic in a time-slot are kept in a ``Rooms`` object,
+which knows which of them a new attendee should go to according to the
+scheduler's fill policy:
+
+``even``
+    Put attendees in the emptiest session, so that sessions fill up
+    evenly. This is the default.
+``ordered``
+    Put attendees in the first session, in the order the sessions
+    were listed when the topic was added, that has room, so that each
+    session is filled before the next one is used.
+
+In both cases, ties are broken by that same order.
+"""
+
+import heapq
+
+FILL_POLICIES = ('even', 'ordered')
+
+
+def even_key(session):
+    """Sort key for the ``even`` policy; lower is better."""
+
+    return (len(session.attendees) >= session.capacity,
+            len(session.attendees), session.id)
+
+
+def ordered_key(session):
+    """Sort key for the ``ordered`` policy; lower is better."""
+
+    return (len(session.attendees) >= session.capacity, session.id)
+
+
+POLICY_KEYS = {
+    'even': even_key,
+    'ordered': ordered_key,
+}
+
+
+class Rooms(object):
+    """The sessions of a topic in one time-slot.
+
+    With more than one session, they're kept in a heap by the fill
+    policy's sort key, so the best one can be found in O(log k) time.
+    Rather than removing a session's old entry whenever its occupancy
+    changes, ``update`` just pushes a new entry, and stale entries are
+    discarded when they reach the top of the heap.
+
+    Public properties
+    -----------------
+
+    ``time_slot``
+        ``TimeSlot`` object.
+    ``sessions``
+        List of ``Session`` objects, in the order they were added.
+    ``key``
+        Sort key function of the fill policy.
+    """
+
+    __slots__ = ('time_slot', 'sessions', 'key', '_heap')
+
+    def __init__(self, time_slot, sessions, key):
+        self.time_slot = time_slot
+        self.sessions = sessions
+        self.key = key
+        self._heap = None
+        if len(sessions) > 1:
+            self._rebuild()
+
+    def best(self):
+        """Return the session the next attendee should go to, or None.
+
+        None means all of the sessions are full.
+        """
+
+        if self._heap is None:
+            session = self.sessions[0]
+            if len(session.attendees) >= session.capacity:
+                return None
+            return session
+        heap = self._heap
+        key = self.key
+        while heap[0][0] != key(heap[0][1]):
+            heapq.heappop(heap)
+        session = heap[0][1]
+        if len(session.attendees) >= session.capacity:
+            return None
+        return session
+
+    def update(self, session):
+        """Note that the number of attendees in a session has changed."""
+
+        heap = self._heap
+        heapq.heappush(heap, (self.key(session), session))
+        if len(heap) > 4 * len(self.sessions) + 16:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._heap = [(self.key(s), s) for s in self.sessions]
+        heapq.heapify(self._heap)
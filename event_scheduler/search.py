@@ -0,0 +1,186 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Local search improvers for event schedules.
+
+An improver is any object with an ``improve(scheduler)`` method which
+takes a ``Scheduler`` whose attendees have already been scheduled and
+rearranges their assignments to lower the total score. Pass one to
+``Scheduler.schedule`` to have it run after the improve phase.
+"""
+
+import math
+import random
+import time
+
+
+class SimulatedAnnealing(object):
+    """Improve a schedule by simulated annealing.
+
+    Each step picks a random attendee, one of their non-immutable
+    assignments and one of their unassigned preferences, and a session
+    for that preference either in the same time-slot or in a time-slot
+    the attendee has open. If the session has room, the attendee moves
+    into it; otherwise, they trade places with a random attendee in it
+    who wants the session being given up, if there is one. The change
+    in the total score of a move only involves the preferences being
+    swapped, so it's computed without rescoring anybody.
+
+    Moves that lower the total score are always made; moves that raise
+    it are made with a probability that goes down as the temperature
+    cools. When the budget runs out, the scheduler is rolled back to
+    the best schedule seen. The deadline of a ``Scheduler.schedule``
+    run is part of the budget, and cancelling the run (see its
+    ``stop`` argument) ends it the same way.
+
+    Public properties
+    -----------------
+
+    ``iterations``
+        Maximum number of moves to try, or None for no limit.
+    ``time_limit``
+        Maximum number of seconds to run for, or None for no limit.
+    ``temperature``
+        Starting temperature.
+    ``cooling``
+        Factor by which the temperature is multiplied after each move.
+        By default, it's chosen so that the temperature falls to 1% of
+        its starting value by the end of ``iterations``.
+    ``seed``
+        Seed for the random number generator, for repeatable runs.
+    """
+
+    def __init__(self, iterations=100000, time_limit=None, temperature=1.0,
+                 cooling=None, seed=None):
+        if iterations is None and time_limit is None:
+            raise ValueError('Need an iteration limit or a time limit')
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.temperature = temperature
+        if cooling is None:
+            cooling = 0.01 ** (1.0 / iterations) if iterations else 0.9999
+        self.cooling = cooling
+        self.seed = seed
+
+    def improve(self, scheduler):
+        """Improve the schedule; return how much the total score fell."""
+
+        rng = random.Random(self.seed)
+        deadline = None if self.time_limit is None \
+            else time.time() + self.time_limit
+        if scheduler._deadline is not None:
+            deadline = scheduler._deadline if deadline is None \
+                else min(deadline, scheduler._deadline)
+        attendees = [a for a in scheduler._attendee_list
+                     if a.num_assignments < len(a.preferences) and
+                     any(p.assigned and not p.immutable
+                         for p in a.preferences)]
+        if not attendees:
+            return 0
+
+        # Lists of session members, so that we can pick one at random.
+        # Positions are tracked so that members can be removed in O(1).
+        members = {}
+        positions = {}
+        for session in scheduler._session_list:
+            members[session] = sorted(session.attendees, key=lambda a: a.id)
+            for i, attendee in enumerate(members[session]):
+                positions[attendee, session] = i
+
+        def leave(attendee, session):
+            scheduler.unassign(attendee, session)
+            session_members = members[session]
+            i = positions.pop((attendee, session))
+            last = session_members.pop()
+            if last is not attendee:
+                session_members[i] = last
+                positions[last, session] = i
+
+        def join(attendee, session):
+            scheduler._assign(attendee, session)
+            positions[attendee, session] = len(members[session])
+            members[session].append(attendee)
+
+        # With overlapping time-slots, a move can leave somebody who
+        # had a full schedule with free time, so those moves are undone.
+        overlapping = scheduler._time_slots_overlap()
+        temperature = self.temperature
+        current = best = 0
+        checkpoint = scheduler.checkpoint('anneal')
+        iteration = 0
+        while self.iterations is None or iteration < self.iterations:
+            iteration += 1
+            if iteration % 256 == 0 and (
+                    deadline is not None and time.time() > deadline or
+                    scheduler._stop is not None and scheduler._stop()):
+                break
+            temperature *= self.cooling
+
+            attendee = rng.choice(attendees)
+            assigned = [p for p in attendee.preferences
+                        if p.assigned and not p.immutable]
+            unassigned = [p for p in attendee.preferences if not p.assigned]
+            old = rng.choice(assigned)
+            new = rng.choice(unassigned)
+            old_session = old.session
+            sessions = [s for s in new.topic.sessions
+                        if not scheduler._blocked(attendee, s.time_slot,
+                                                  old_session.time_slot)]
+            if not sessions:
+                continue
+            new_session = rng.choice(sessions)
+            delta = new.index - old.index
+
+            other = None
+            if len(new_session.attendees) >= new_session.capacity:
+                if not members[new_session]:
+                    continue
+                other = rng.choice(members[new_session])
+                other_old = other.topic_preferences[new_session.topic]
+                other_new = other.topic_preferences.get(old_session.topic)
+                if other_old.immutable or other_new is None or \
+                   other_new.assigned or \
+                   scheduler._blocked(other, old_session.time_slot,
+                                      new_session.time_slot):
+                    continue
+                delta += other_new.index - other_old.index
+
+            if delta > 0 and \
+               rng.random() >= math.exp(-delta / max(temperature, 1e-9)):
+                continue
+
+            leave(attendee, old_session)
+            if other is not None:
+                leave(other, new_session)
+                join(other, old_session)
+            join(attendee, new_session)
+            if overlapping and not (
+                    scheduler._is_full(attendee) and
+                    (other is None or scheduler._is_full(other))):
+                # A shorter session left somebody with free time.
+                leave(attendee, new_session)
+                if other is not None:
+                    leave(other, old_session)
+                    join(other, new_session)
+                join(attendee, old_session)
+                continue
+            current += delta
+            if current < best:
+                best = current
+                scheduler.commit(checkpoint)
+                checkpoint = scheduler.checkpoint('anneal')
+
+        scheduler.rollback(checkpoint)
+        return -best
@@ -0,0 +1,417 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Scheduling from asyncio without blocking the event loop.
+
+Scheduling a large event can take minutes, which is far too long to
+block an event loop for. A ``SchedulingService`` keeps a ``Scheduler``
+for each of any number of events, and schedules them in a pool of
+worker processes, so that, e.g., a web server can go on serving
+requests, and several events can be scheduled at once without holding
+each other up::
+
+  async with SchedulingService() as service:
+      await service.load_json('summit', time_slots='slots.jsonl',
+                              topics='topics.jsonl',
+                              attendees='attendees.jsonl')
+      run = service.start('summit', time_limit=60)
+      async for phase, done, total in run.progress():
+          print(phase, done, total)
+      result = await run.result()
+      result.scheduler.export(sys.stdout)
+
+A run is sent to its worker as a snapshot (see the ``snapshot``
+module), along with the ``Scheduler``'s constructor arguments, and the
+worker sends back the assignments it made. When the run is over, they
+replace the non-immutable assignments of the event's ``Scheduler``,
+which stays the same object.
+
+This module requires Python 3.7 or later.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import io
+import multiprocessing
+import queue
+import time
+
+from .scheduler import Scheduler, ScheduleFailureError
+
+# The possible statuses of a ``RunResult``.
+STATUSES = ('complete', 'failed', 'cancelled', 'deadline')
+
+
+class SchedulingService(object):
+    """Schedules events in worker processes on behalf of asyncio code.
+
+    ``workers`` is the number of worker processes, by default one per
+    CPU, which is also how many events can be scheduled at once.
+
+    An event can't be changed while it's being scheduled; methods that
+    would do so raise an exception instead.
+
+    Public properties
+    -----------------
+
+    ``events``
+        List of the names of the events.
+    """
+
+    def __init__(self, workers=None):
+        self._pool = ProcessPoolExecutor(workers)
+        self._manager = None
+        self._schedulers = {}
+        self._runs = {}
+
+    @property
+    def events(self):
+        return list(self._schedulers)
+
+    def scheduler(self, event):
+        """Return the ``Scheduler`` for an event.
+
+        It's the same object for as long as the event exists. Don't
+        change it while the event is being scheduled, since the
+        changes would be lost when the run finishes.
+        """
+
+        return self._schedulers[event]
+
+    def add_event(self, event, scheduler):
+        """Add an event whose ``Scheduler`` has already been set up."""
+
+        self._check_idle(event)
+        self._schedulers[event] = scheduler
+
+    def remove_event(self, event):
+        """Forget about an event."""
+
+        self._check_idle(event)
+        del self._schedulers[event]
+
+    async def load_csv(self, event, time_slots=None, topics=None,
+                       attendees=None, header=False, **options):
+        """Load an event from CSV files, as ``Scheduler.load_csv``.
+
+        If the event doesn't exist yet, it's created, and ``options``
+        are passed to the ``Scheduler`` constructor. Otherwise, the
+        files are loaded into the existing event. The files are read in
+        a thread, so this doesn't block the event loop.
+        """
+
+        await self._update(event, options, 'load_csv', time_slots, topics,
+                           attendees, header)
+
+    async def load_json(self, event, time_slots=None, topics=None,
+                        attendees=None, **options):
+        """Load an event from JSON Lines files, as ``Scheduler.load_json``.
+
+        See ``load_csv``.
+        """
+
+        await self._update(event, options, 'load_json', time_slots, topics,
+                           attendees)
+
+    async def add_attendee(self, event, name, organization, topics,
+                           available=None):
+        """Add an attendee to an event, as ``add_attendee_incremental``.
+
+        Returns True if the new attendee's schedule is full.
+        """
+
+        return await self._update(event, None, 'add_attendee_incremental',
+                                  name, organization, topics, available)
+
+    async def remove_attendee(self, event, attendee, refill=True):
+        """Remove an attendee from an event, as ``remove_attendee``.
+
+        ``attendee`` is the attendee's ``"{org} - {name}"`` key.
+        Returns the number of moves made to refill seats.
+        """
+
+        return await self._update(event, None, 'remove_attendee', attendee,
+                                  refill)
+
+    async def update_preferences(self, event, attendee, topics):
+        """Change an attendee's preferences.
+
+        The attendee is removed and added back with the new
+        preferences, keeping their availability, so their old seats go
+        to others who want them and they're given the best open
+        sessions for their new preferences. Their immutable
+        assignments, e.g., manual ones, are kept for the topics that
+        are still in their preferences. Returns True if their schedule
+        is full.
+        """
+
+        def update(scheduler):
+            old = scheduler.attendees[attendee]
+            # Look up the topics first, so as not to lose the attendee.
+            new_topics = [scheduler.topics[topic] for topic in topics]
+            available = scheduler._available_names(old)
+            kept = [p.session for p in old.preferences
+                    if p.assigned and p.immutable and p.topic in new_topics]
+            freed = [s for s in old.booked_sessions.values()
+                     if s not in kept]
+            scheduler.remove_attendee(old, refill=False)
+            scheduler.add_attendee(old.name, old.organization, new_topics,
+                                   available)
+            new = scheduler.attendees[attendee]
+            for session in kept:
+                scheduler._assign(new, session, immutable=True)
+            scheduler._refill(freed, 100)
+            return scheduler._schedule_attendee(new)
+
+        return await self._update(event, None, update)
+
+    async def _update(self, event, options, method, *args):
+        """Call a ``Scheduler`` method on an event in a thread.
+
+        ``method`` is a method name or a function taking the scheduler.
+        If ``options`` isn't None, the event is created if necessary.
+        """
+
+        self._check_idle(event)
+        if event not in self._schedulers:
+            if options is None:
+                raise KeyError(event)
+            self.add_event(event, Scheduler(**options))
+        scheduler = self._schedulers[event]
+        if isinstance(method, str):
+            method = getattr(scheduler, method)
+        else:
+            args = (scheduler,) + args
+        # Claim the event while the thread works on it, so that nothing
+        # else changes it at the same time.
+        self._runs[event] = None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, method, *args)
+        finally:
+            del self._runs[event]
+
+    def _check_idle(self, event):
+        if event in self._runs:
+            raise Exception(u'Event {} is busy'.format(event))
+
+    def start(self, event, time_limit=None, improver=None, stats=False):
+        """Start scheduling an event; return a ``Run``.
+
+        ``improver`` and ``stats`` are passed to ``Scheduler.schedule``.
+        If ``time_limit`` is specified, the run is stopped when that
+        many seconds have passed, counting from now.
+
+        Must be called from a coroutine.
+        """
+
+        self._check_idle(event)
+        scheduler = self._schedulers[event]
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        deadline = None if time_limit is None else time.time() + time_limit
+        run = Run(event, self._manager.Queue(), self._manager.Event())
+        self._runs[event] = run
+        run._task = asyncio.ensure_future(self._run(
+            run, scheduler, deadline, improver, stats))
+        return run
+
+    async def schedule(self, event, time_limit=None, improver=None,
+                       stats=False):
+        """Schedule an event and return the ``RunResult``.
+
+        This is ``start`` followed by ``Run.result``.
+        """
+
+        return await self.start(event, time_limit, improver, stats).result()
+
+    async def _run(self, run, scheduler, deadline, improver, stats):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, _dumps, scheduler)
+            future = loop.run_in_executor(
+                self._pool, _schedule, data, scheduler._options(),
+                run._updates, run._cancel, deadline, improver, stats)
+            await self._pump(run, future)
+            status, stats, error, assignments = await future
+            await loop.run_in_executor(None, scheduler._install,
+                                       assignments)
+            return RunResult(status, scheduler, stats, error)
+        finally:
+            del self._runs[run.event]
+            run._progress.put_nowait(None)
+
+    async def _pump(self, run, future):
+        """Pass progress reports from a worker to the ``Run``."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                update = await loop.run_in_executor(
+                    None, run._updates.get, True, 0.1)
+            except queue.Empty:
+                if future.done():
+                    # The worker died without saying it was finished.
+                    return
+                continue
+            if update is None:
+                return
+            run._progress.put_nowait(update)
+
+    async def close(self):
+        """Cancel all runs, wait for them, and shut down the workers."""
+
+        runs = [r for r in self._runs.values() if r is not None]
+        for run in runs:
+            run.cancel()
+        await asyncio.gather(*(r._task for r in runs),
+                             return_exceptions=True)
+        self._pool.shutdown()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class Run(object):
+    """A run of the scheduler on an event, started by ``start``.
+
+    Public properties
+    -----------------
+
+    ``event``
+        The name of the event being scheduled.
+    """
+
+    def __init__(self, event, updates, cancel):
+        self.event = event
+        self._updates = updates
+        self._cancel = cancel
+        self._progress = asyncio.Queue()
+        self._task = None
+
+    def cancel(self):
+        """Stop the run at the next swap or assignment attempt.
+
+        The run still has a result, whose status is "cancelled".
+        """
+
+        self._cancel.set()
+
+    def done(self):
+        """Return whether the run is over."""
+
+        return self._task.done()
+
+    async def progress(self):
+        """Generate (phase, done, total) progress reports until the end.
+
+        These are the arguments of the ``progress`` callback of
+        ``Scheduler.schedule``. Only one coroutine should read them.
+        """
+
+        while True:
+            update = await self._progress.get()
+            if update is None:
+                return
+            yield update
+
+    async def result(self):
+        """Wait for the run to finish, and return its ``RunResult``.
+
+        If the run was cancelled or ran out of time, this is the
+        schedule as it stood when it stopped, which is never in the
+        middle of a change. Either way, the run stops at the next swap
+        or assignment attempt, or within a few hundred moves of the
+        improver (see the ``deadline`` and ``stop`` arguments of
+        ``Scheduler.schedule``).
+        """
+
+        return await asyncio.shield(self._task)
+
+
+class RunResult(object):
+    """What a ``Run`` came up with.
+
+    Public properties
+    -----------------
+
+    ``status``
+        "complete" if everybody's schedule was filled, "failed" if
+        scheduling failed (see ``ScheduleFailureError``), "cancelled"
+        if the run was cancelled, or "deadline" if it ran out of time.
+    ``scheduler``
+        The event's ``Scheduler``, with the assignments the run made.
+    ``stats``
+        ``ScheduleStats`` for the run.
+    ``error``
+        The error message if scheduling failed, or None.
+    """
+
+    def __init__(self, status, scheduler, stats, error):
+        if status not in STATUSES:
+            raise ValueError(u'Unknown run status {}'.format(status))
+        self.status = status
+        self.scheduler = scheduler
+        self.stats = stats
+        self.error = error
+
+    def __str__(self):
+        return u'{}{}'.format(self.status,
+                              u': {}'.format(self.error) if self.error else '')
+
+
+def _dumps(scheduler):
+    f = io.BytesIO()
+    scheduler.save(f)
+    return f.getvalue()
+
+
+def _schedule(data, options, updates, cancel, deadline, improver, stats):
+    """Schedule an event in a worker process.
+
+    Returns a tuple of (status, stats, error, assignments), where the
+    assignments are as returned by ``Scheduler._mutable_assignments``.
+    """
+
+    scheduler = Scheduler.load(io.BytesIO(data), **options)
+    checked = [0, False]
+
+    def progress(phase, done, total):
+        updates.put((phase, done, total))
+
+    def stop():
+        # The event lives in the manager process, so don't ask it more
+        # than a few times a second.
+        now = time.time()
+        if now - checked[0] > 0.05:
+            checked[:] = [now, cancel.is_set()]
+        return checked[1]
+
+    error = None
+    try:
+        run_stats = scheduler.schedule(improver, stats, progress, deadline,
+                                       stop=stop)
+        status = run_stats.status
+    except ScheduleFailureError as e:
+        status, run_stats, error = 'failed', e.stats, str(e)
+    finally:
+        updates.put(None)
+    return status, run_stats, error, scheduler._mutable_assignments()
@@ -0,0 +1,246 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Binary snapshots of scheduler state.
+
+Use these through ``Scheduler.save`` and ``Scheduler.load``.
+
+A snapshot is a magic number followed by a sequence of arrays of
+32-bit integers (or, for times, doubles), each preceded by its length,
+in the byte order of the machine that wrote it (the loader swaps bytes
+if necessary). Strings
+are stored as a UTF-8 byte array plus an array of their end offsets.
+Everything refers to time-slots, topics, sessions and attendees by
+their position in these arrays, so the arrays can be read in bulk
+straight into ``array`` objects rather than parsed record by record.
+
+In order, the sections are:
+
+* time-slot names
+* start and end time of each time-slot, NaN if it has none
+* topic names
+* number of sessions of each topic
+* time-slot of each session, in topic order
+* capacity of each session
+* attendee names
+* attendee organizations
+* end offset of each attendee's preferences in the next array
+* topic of each preference, in attendee and preference order
+* attendee, session and immutable flag of each assignment
+* attendees who aren't available for all time-slots
+* end offset of each such attendee's time-slots in the next array
+* time-slots those attendees are available for
+
+Older snapshots, which lack the time-slot times or availability, can
+still be read.
+"""
+
+from array import array
+
+MAGIC = b'ESCHED03'
+_VERSIONS = {b'ESCHED01': 1, b'ESCHED02': 2, MAGIC: 3}
+_NO_TIME = float('nan')
+_BYTE_ORDER = 0x01020304
+_SWAPPED_BYTE_ORDER = 0x04030201
+
+
+def save(scheduler, f):
+    """Write a snapshot of ``scheduler`` to the open binary file ``f``."""
+
+    f.write(MAGIC)
+    _write(f, array('i', [_BYTE_ORDER]))
+
+    _write_strings(f, [t.name for t in scheduler._time_slot_list])
+    times = array('d')
+    for time_slot in scheduler._time_slot_list:
+        if time_slot.start is None:
+            times.extend((_NO_TIME, _NO_TIME))
+        else:
+            times.extend((time_slot.start, time_slot.end))
+    _write(f, times)
+    _write_strings(f, [t.name for t in scheduler._topic_list])
+
+    slot_numbers = {t: i for i, t in enumerate(scheduler._time_slot_list)}
+    session_numbers = {}
+    session_slots = array('i')
+    session_capacities = array('i')
+    for topic in scheduler._topic_list:
+        for session in topic.sessions:
+            session_numbers[session] = len(session_numbers)
+            session_slots.append(slot_numbers[session.time_slot])
+            session_capacities.append(session.capacity)
+    _write(f, array('i', [len(t.sessions) for t in scheduler._topic_list]))
+    _write(f, session_slots)
+    _write(f, session_capacities)
+
+    attendees = scheduler._attendee_list
+    _write_strings(f, [a.name for a in attendees])
+    _write_strings(f, [a.organization for a in attendees])
+
+    topic_numbers = {t: i for i, t in enumerate(scheduler._topic_list)}
+    ends = array('i')
+    topics = array('i')
+    assignments = array('i')
+    for attendee in attendees:
+        for preference in attendee.preferences:
+            topics.append(topic_numbers[preference.topic])
+            if preference.session is not None:
+                assignments.extend((attendee.id,
+                                    session_numbers[preference.session],
+                                    preference.immutable))
+        ends.append(len(topics))
+    _write(f, ends)
+    _write(f, topics)
+    _write(f, assignments)
+
+    limited = array('i')
+    ends = array('i')
+    available = array('i')
+    for attendee in attendees:
+        if attendee.available_mask != -1:
+            limited.append(attendee.id)
+            available.extend(slot_numbers[t]
+                             for t in scheduler._time_slot_list
+                             if t.mask & attendee.available_mask)
+            ends.append(len(available))
+    _write(f, limited)
+    _write(f, ends)
+    _write(f, available)
+
+
+def read(f):
+    """Read a snapshot from the open binary file ``f``.
+
+    Returns a tuple of (time-slot names, time-slot times, topic names,
+    sessions per topic, session time-slots, session capacities,
+    attendee names, attendee organizations, preference ends,
+    preference topics, assignments, availability). The times are a
+    list of (start, end) tuples, which are both None for time-slots
+    without times. The availability is a list of (attendee, available
+    time-slots) tuples for attendees who aren't available for all
+    time-slots.
+    """
+
+    version = _VERSIONS.get(f.read(len(MAGIC)))
+    if version is None:
+        raise ValueError('Not an event scheduler snapshot')
+    # The marker's length prefix is in the writer's byte order too, so
+    # read both without swapping anything yet.
+    marker = _read_items(f, 'i', 2, False)[1]
+    if marker == _BYTE_ORDER:
+        swap = False
+    elif marker == _SWAPPED_BYTE_ORDER:
+        swap = True
+    else:
+        raise ValueError('Snapshot has an unknown byte order')
+    time_slots = _read_strings(f, swap)
+    if version < 2:
+        times = [(None, None)] * len(time_slots)
+    else:
+        times = []
+        t = _read(f, swap, 'd')
+        for i in range(0, len(t), 2):
+            if t[i] != t[i]:  # NaN
+                times.append((None, None))
+            else:
+                times.append((_int(t[i]), _int(t[i + 1])))
+    topics = _read_strings(f, swap)
+    sessions = [_read(f, swap) for i in range(3)]
+    names = _read_strings(f, swap)
+    organizations = _read_strings(f, swap)
+    preferences = [_read(f, swap) for i in range(3)]
+    availability = []
+    if version >= 3:
+        limited, ends, available = [_read(f, swap) for i in range(3)]
+        start = 0
+        for attendee, end in zip(limited, ends):
+            availability.append((attendee, available[start:end]))
+            start = end
+    return tuple([time_slots, times, topics] + sessions +
+                 [names, organizations] + preferences + [availability])
+
+
+def _write(f, a):
+    _write_length(f, len(a))
+    f.write(_bytes(a))
+
+
+def _write_length(f, length):
+    f.write(_bytes(array('i', [length])))
+
+
+def _bytes(a):
+    return a.tobytes() if hasattr(a, 'tobytes') else a.tostring()
+
+
+def _read_length(f, swap):
+    return _read_items(f, 'i', 1, swap)[0]
+
+
+def _read_items(f, typecode, count, swap):
+    # Not array.fromfile, which only works on real files under Python 2.
+    a = array(typecode)
+    data = f.read(count * a.itemsize)
+    if len(data) != count * a.itemsize:
+        raise EOFError('Snapshot is truncated')
+    if hasattr(a, 'frombytes'):
+        a.frombytes(data)
+    else:
+        a.fromstring(data)
+    if swap:
+        a.byteswap()
+    return a
+
+
+def _int(x):
+    # Times are stored as doubles, but most are whole numbers.
+    return int(x) if x == int(x) else x
+
+
+def _read(f, swap, typecode='i'):
+    return _read_items(f, typecode, _read_length(f, swap), swap)
+
+
+def _write_strings(f, strings):
+    encoded = [type(u'')(s).encode('utf-8') for s in strings]
+    ends = array('i')
+    end = 0
+    for s in encoded:
+        end += len(s)
+        ends.append(end)
+    _write(f, ends)
+    blob = b''.join(encoded)
+    _write_length(f, len(blob))
+    f.write(blob)
+
+
+def _read_strings(f, swap):
+    ends = _read(f, swap)
+    length = _read_length(f, swap)
+    blob = f.read(length)
+    if len(blob) != length:
+        raise EOFError('Snapshot is truncated')
+    text = blob.decode('utf-8')
+    if len(text) != len(blob):
+        # Not ASCII, so byte offsets aren't character offsets.
+        text = blob
+    strings = []
+    start = 0
+    for end in ends:
+        strings.append(text[start:end])
+        start = end
+    if text is blob:
+        strings = [s.decode('utf-8') for s in strings]
+    return strings
@@ -0,0 +1,138 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Instrumentation for scheduling runs."""
+
+from collections import OrderedDict
+
+
+class ScheduleStats(object):
+    """Statistics about a run of ``Scheduler.schedule``.
+
+    Phase timings are always collected, since they only cost a clock
+    read per phase. The counters are only maintained if the run was
+    started with ``stats=True``; otherwise they stay at zero, and the
+    scheduler doesn't so much as look at them.
+
+    Public properties
+    -----------------
+
+    ``phases``
+        Ordered dictionary of phase name => seconds spent in it. The
+        phases are "time-slot", "fill", "improve" and, if an improver
+        was used, "improver", preceded by "random" for a run of
+        ``random_schedule``.
+    ``status``
+        "complete" if the run finished, or, if it was stopped because
+        its budget ran out, "deadline" or "iterations", or "cancelled"
+        if it was cancelled.
+    ``phase``
+        The last phase the run reached, i.e., the one it was stopped
+        in if it was stopped.
+    ``iterations``
+        Number of iterations used, if the run had a budget.
+    ``unfilled``
+        Number of attendees whose schedules weren't full when the run
+        was stopped.
+    ``counting``
+        Whether the counters below were maintained.
+    ``assign_attempts``
+        Number of sessions ``assign`` tried to put an attendee in.
+        When it picks the best session in one pass, that's every
+        session it considered.
+    ``slot_conflicts``
+        How many of those failed because the attendee was already
+        booked in the session's time-slot.
+    ``no_space``
+        How many of those failed because the session was full.
+    ``checkpoints``
+        Number of checkpoints created.
+    ``commits``
+        Number of checkpoints committed.
+    ``rollbacks``
+        Number of checkpoints rolled back.
+    ``swap_attempts``
+        Number of calls to ``swap``.
+    ``swaps``
+        How many of those succeeded.
+    ``augment_attempts``
+        Number of calls to ``augment``.
+    ``augments``
+        How many of those succeeded.
+    ``swaps_skipped``
+        Number of swap attempts skipped because they were known to
+        fail (see ``Scheduler.swap_memo``).
+    """
+
+    COUNTERS = ('assign_attempts', 'slot_conflicts', 'no_space',
+                'checkpoints', 'commits', 'rollbacks', 'swap_attempts',
+                'swaps', 'swaps_skipped', 'augment_attempts', 'augments')
+
+    def __init__(self, counting=False):
+        self.counting = counting
+        self.phases = OrderedDict()
+        self.status = 'complete'
+        self.phase = None
+        self.iterations = 0
+        self.unfilled = 0
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+
+    @property
+    def seconds(self):
+        """Total seconds spent in all phases."""
+
+        return sum(self.phases.values())
+
+    def add(self, other):
+        """Add the statistics of another run to these.
+
+        Phase timings and counters are summed. If the other run was
+        stopped, so is the combined one, in the other run's phase.
+        """
+
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0) + seconds
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.iterations += other.iterations
+        self.unfilled += other.unfilled
+        if other.status != 'complete':
+            self.status = other.status
+            self.phase = other.phase
+        elif self.phase is None:
+            self.phase = other.phase
+
+    def as_dict(self):
+        """Return the statistics as a dictionary, e.g., for logging."""
+
+        d = {name: getattr(self, name) for name in self.COUNTERS}
+        d.update(phases=dict(self.phases), seconds=self.seconds,
+                 counting=self.counting, status=self.status,
+                 phase=self.phase, iterations=self.iterations,
+                 unfilled=self.unfilled)
+        return d
+
+    def __str__(self):
+        o = u', '.join(u'{} {:.3f}s'.format(name, seconds)
+                       for name, seconds in self.phases.items())
+        if self.counting:
+            o += u'\n' + u', '.join(u'{} {}'.format(name, getattr(self, name))
+                                    for name in self.COUNTERS)
+        if self.status != 'complete':
+            o += u'\nstopped ({}) in {} phase after {} iterations, {} ' \
+                u'unfilled'.format(self.status, self.phase, self.iterations,
+                                   self.unfilled)
+        return o
@@ -37,6 +37,8 @@ setup(
         'License :: OSI Approved :: GNU General Public License v3 or later '
         '(GPLv3+)',
         'Programming Language :: Python',
+        'Programming Language :: Python :: 2',
+        'Programming Language :: Python :: 3',
         'Topic :: Office/Business :: Scheduling',
     ]
 )
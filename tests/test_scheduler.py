@@ -0,0 +1,164 @@
+# Copyright (c) 2015 Jonathan Kamens.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or (at
+# your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Checks of scheduler behavior that's easy to break without noticing.
+
+Run with ``python -m unittest discover tests`` from the top of the
+source tree.
+"""
+
+import io
+import random
+import sys
+import unittest
+
+from benchmarks.generator import generate
+from event_scheduler import Scheduler, snapshot
+from event_scheduler.arrays import numpy
+
+unicode_type = type(u'')
+
+
+def _assignments(scheduler):
+    return sorted((unicode_type(a), unicode_type(p.session), p.immutable)
+                  for a in scheduler._attendee_list
+                  for p in a.preferences if p.session is not None)
+
+
+def _score(scheduler):
+    return sum(a.score for a in scheduler._attendee_list)
+
+
+class MultiStartTest(unittest.TestCase):
+    def test_lowest_score_wins(self):
+        scores = {}
+        for seed in range(6):
+            scheduler = generate(300, seed=0)
+            random.seed(seed)
+            scheduler.random_schedule()
+            scores[seed] = _score(scheduler)
+        best = min(scores, key=lambda seed: (scores[seed], seed))
+
+        scheduler = generate(300, seed=0)
+        self.assertEqual(scheduler.multi_start(seeds=[5, 3, 1, 0, 4, 2],
+                                               workers=2), best)
+        self.assertEqual(_score(scheduler), scores[best])
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = generate(200, seed=1)
+        self.scheduler.schedule()
+
+    def test_round_trip(self):
+        f = io.BytesIO()
+        self.scheduler.save(f)
+        f.seek(0)
+        loaded = Scheduler.load(f)
+        self.assertEqual(_assignments(loaded),
+                         _assignments(self.scheduler))
+        loaded.check_consistency()
+
+    def test_other_byte_order(self):
+        native = io.BytesIO()
+        snapshot.save(self.scheduler, native)
+        swapped = io.BytesIO()
+        original = snapshot._bytes
+
+        def byteswapped(a):
+            a = a[:]
+            a.byteswap()
+            return original(a)
+
+        snapshot._bytes = byteswapped
+        try:
+            snapshot.save(self.scheduler, swapped)
+        finally:
+            snapshot._bytes = original
+        self.assertNotEqual(native.getvalue(), swapped.getvalue())
+        native.seek(0)
+        swapped.seek(0)
+        self.assertEqual(snapshot.read(swapped), snapshot.read(native))
+
+
+class EquivalenceTest(unittest.TestCase):
+    """Options that are only supposed to make scheduling faster."""
+
+    def check_same(self, **options):
+        for seed in range(3):
+            plain = generate(500, slack=1.05, seed=seed)
+            other = generate(500, slack=1.05, seed=seed, **options)
+            results = []
+            for scheduler in (plain, other):
+                try:
+                    scheduler.schedule()
+                    results.append(True)
+                except Exception as e:
+                    results.append(str(e))
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(_assignments(plain), _assignments(other))
+
+    def test_swap_memo(self):
+        self.check_same(swap_memo_size=100000)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_arrays(self):
+        self.check_same(arrays=True)
+
+
+class CancelTest(unittest.TestCase):
+    def test_stop(self):
+        scheduler = generate(500, seed=0)
+        stats = scheduler.schedule(stop=lambda: True)
+        self.assertEqual(stats.status, 'cancelled')
+        self.assertEqual(scheduler._checkpoint_names, [])
+        scheduler.check_consistency()
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'Needs Python 3.7 or later')
+class ServiceTest(unittest.TestCase):
+    def test_update_preferences_keeps_immutable(self):
+        import asyncio
+        from event_scheduler.service import SchedulingService
+
+        scheduler = Scheduler()
+        scheduler.add_time_slots(['S1', 'S2'])
+        scheduler.add_topic('T1', [('S1', 2)])
+        scheduler.add_topic('T2', [('S2', 2)])
+        scheduler.add_topic('T3', [('S1', 2), ('S2', 2)])
+        scheduler.add_attendee('A', 'A', ['T1', 'T2', 'T3'])
+        scheduler.add_attendee('B', 'B', ['T1', 'T3', 'T2'])
+        scheduler.manually_assign('A - A', 'T1')
+        scheduler.schedule()
+
+        # Not async def, so that this module still imports on Python 2.
+        loop = asyncio.new_event_loop()
+        service = SchedulingService(1)
+        try:
+            service.add_event('event', scheduler)
+            self.assertTrue(loop.run_until_complete(
+                service.update_preferences('event', 'A - A', ['T3', 'T1'])))
+        finally:
+            loop.run_until_complete(service.close())
+            loop.close()
+        attendee = scheduler.attendees['A - A']
+        preference = attendee.topic_preferences[scheduler.topics['T1']]
+        self.assertTrue(preference.assigned)
+        self.assertTrue(preference.immutable)
+        scheduler.check_consistency()
+
+
+if __name__ == '__main__':
+    unittest.main()